@@ -9,15 +9,35 @@ Usage:
     python3 track_claude_delta.py --help             # Show help
 """
 
-import json
+import functools
 import os
 import sys
 from pathlib import Path
-from datetime import datetime
 import time
-from collections import defaultdict
 import argparse
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+try:
+    from watchfiles import Change, watch
+except ImportError:
+    watch = None
+
+# Directory mtimes newer than this (in ns) are not trusted for caching scans
+MTIME_SETTLE_NS = 2_000_000_000
+
+# Seconds between full rescans when using filesystem events
+HOUSEKEEPING_INTERVAL = 10
+
+# User text starting with any of these is metadata (ide_selection, ide_opened_file, etc.)
+_SKIP_PREFIXES = ('<', 'This may or may not')
+
+# Raw key every line carrying a text content item must contain
+_TEXT_KEY = b'"text"'
+
 # Color codes for terminal
 class Colors:
     CYAN = '\033[96m'
@@ -34,89 +54,186 @@ def get_projects_dir():
     return home / '.claude' / 'projects'
 
 
-def find_conversation_files(projects_dir, project_filter=None):
-    """Find all conversation JSONL files, optionally filtered by project."""
+def find_conversation_files(projects_dir, project_filter=None, dir_mtimes=None):
+    """Find all conversation JSONL files, optionally filtered by project.
+
+    Paths are returned as plain strings. If dir_mtimes is given, it is filled
+    with the st_mtime_ns of every directory scanned, for use with
+    directories_changed().
+    """
     conv_files = {}
-    for file_path in projects_dir.rglob('*.jsonl'):
-        parent = file_path.parent.name
+    stack = [str(projects_dir)]
+    while stack:
+        dirpath = stack.pop()
+        if dir_mtimes is not None:
+            dir_mtimes[dirpath] = _stable_mtime_ns(dirpath)
 
+        parent = os.path.basename(dirpath)
         # Apply project filter if specified
-        if project_filter and project_filter.lower() not in parent.lower():
+        matches_filter = not project_filter or project_filter.lower() in parent.lower()
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif matches_filter and entry.name.endswith('.jsonl'):
+                        conv_files.setdefault(parent, []).append(entry.path)
+        except OSError:
             continue
-
-        if parent not in conv_files:
-            conv_files[parent] = []
-        conv_files[parent].append(file_path)
     return conv_files
 
 
-def extract_all_messages(file_path, last_pos=None):
-    """Extract all user and assistant messages from a conversation file after last_pos."""
-    messages = []
+def _stable_mtime_ns(path):
+    """Get a directory's st_mtime_ns, or None if it is too recent to be trusted.
+
+    A file created within the filesystem's timestamp granularity of the scan may
+    not bump the mtime, so recently modified directories are always rescanned.
+    """
     try:
-        with open(file_path, 'r') as f:
-            if last_pos is not None:
-                f.seek(last_pos)
-            for line in f:
-                try:
-                    data = json.loads(line)
-                    # Skip agent initialization files (they have agentId)
-                    if data.get('agentId'):
-                        continue
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if time.time_ns() - mtime_ns < MTIME_SETTLE_NS:
+        return None
+    return mtime_ns
+
+
+def directories_changed(dir_mtimes):
+    """Check whether any directory recorded by find_conversation_files() has changed."""
+    for path, mtime_ns in dir_mtimes.items():
+        if mtime_ns is None:
+            return True
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return True
+        except OSError:
+            return True
+    return False
 
-                    if data.get('type') == 'user' and data.get('message'):
-                        content = data['message'].get('content', [])
-                        for item in content:
-                            if item.get('type') == 'text':
-                                text = item.get('text', '').strip()
-                                # Skip metadata tags (ide_selection, ide_opened_file, etc.)
-                                if text and not text.startswith('<') and not text.startswith('This may or may not'):
-                                    messages.append({
-                                        'type': 'user',
-                                        'text': text,
-                                        'timestamp': data.get('timestamp'),
-                                        'id': data.get('uuid')
-                                    })
-
-                    elif data.get('type') == 'assistant' and data.get('message'):
-                        content = data['message'].get('content', [])
-                        for item in content:
-                            if item.get('type') == 'text':
-                                text = item.get('text', '').strip()
-                                if text:
-                                    messages.append({
-                                        'type': 'assistant',
-                                        'text': text,
-                                        'timestamp': data.get('timestamp'),
-                                        'id': data.get('uuid')
-                                    })
-                except json.JSONDecodeError:
-                    continue
-    except (IOError, PermissionError):
-        pass
+
+def parse_messages(lines):
+    """Extract all user and assistant messages from an iterable of raw JSONL lines (bytes)."""
+    messages = []
+    # Bind hot-loop globals and methods to locals to skip repeated lookups
+    loads = _json.loads
+    append = messages.append
+    text_key = _TEXT_KEY
+    skip_prefixes = _SKIP_PREFIXES
+    for line in lines:
+        # Lines without a text item (tool calls, tool results, progress events)
+        # are dropped while still bytes, before paying for a JSON parse
+        if text_key not in line:
+            continue
+        try:
+            data = loads(line)
+        except ValueError:
+            # orjson.JSONDecodeError and json.JSONDecodeError both subclass ValueError
+            continue
+
+        # Only user and assistant lines can carry messages; decide with one lookup
+        msg_type = data.get('type')
+        if msg_type not in ('user', 'assistant'):
+            continue
+        # Skip agent initialization files (they have agentId)
+        if data.get('agentId'):
+            continue
+        message = data.get('message')
+        if not message:
+            continue
+
+        content = message.get('content') or ()
+        if isinstance(content, str):
+            continue  # Plain-string content has no typed text items
+        is_user = msg_type == 'user'
+        for item in content:
+            item_get = item.get
+            if item_get('type') == 'text':
+                text = item_get('text', '').strip()
+                # Skip metadata tags (ide_selection, ide_opened_file, etc.) in user text
+                if text and not (is_user and text.startswith(skip_prefixes)):
+                    append({
+                        'type': msg_type,
+                        'text': text,
+                        'timestamp': data.get('timestamp'),
+                        'id': data.get('uuid')
+                    })
     return messages
 
 
+def read_new_lines(fd, pos, end):
+    """Read the complete lines between pos and end of an open file descriptor.
+
+    end is normally st_size from a fresh stat, so the new bytes are usually
+    fetched with a single pread; the loop only continues after a short read.
+
+    Returns (lines, new_pos). A trailing partial line is not consumed, so it is
+    read again in full once the writer finishes it.
+    """
+    chunks = []
+    offset = pos
+    while offset < end:
+        chunk = os.pread(fd, end - offset, offset)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    lines = b''.join(chunks).split(b'\n')
+    tail = lines.pop()
+    return lines, offset - len(tail)
+
+
+def get_max_width():
+    """Get the usable terminal width, defaulting to 100."""
+    try:
+        return max(os.get_terminal_size().columns - 4, 1)
+    except OSError:
+        return 100
+
+
 def format_response(text, max_width=None):
     """Format response text for terminal display."""
     if max_width is None:
-        # Get terminal width, default to 100
-        try:
-            max_width = os.get_terminal_size().columns - 4
-        except:
-            max_width = 100
+        max_width = get_max_width()
 
-    lines = text.split('\n')
     formatted = []
-    for line in lines:
-        # Wrap long lines
-        while len(line) > max_width:
-            formatted.append(line[:max_width])
-            line = line[max_width:]
-        formatted.append(line)
+    for line in text.split('\n'):
+        # Wrap long lines into max_width slices (an empty line stays as one empty slice)
+        formatted.extend(line[i:i + max_width] for i in range(0, max(len(line), 1), max_width))
     return formatted
 
 
+@functools.lru_cache(maxsize=1)
+def _format_clock(epoch_seconds):
+    """Format an epoch second as local HH:MM:SS, reusing the result within a second."""
+    return time.strftime("%H:%M:%S", time.localtime(epoch_seconds))
+
+
+@functools.lru_cache(maxsize=None)
+def _colored_project(project):
+    """Get the project name wrapped in its color codes, built once per project."""
+    return f"{Colors.CYAN}{project}{Colors.ENDC}"
+
+
+def render_message(message, project, timestamp, compact=False, max_width=None):
+    """Render a message, including its trailing blank line, as one string for the terminal."""
+    lines = format_response(message['text'], max_width)
+    if compact:
+        # Compact format: just the message
+        out = [f"{Colors.DIM}[{timestamp}]{Colors.ENDC} {lines[0]}"]
+        out.extend(f"         {line}" for line in lines[1:])
+    else:
+        # Full format with header
+        is_user = message['type'] == 'user'
+        marker = ">>" if is_user else "<<"
+        marker_color = Colors.YELLOW if is_user else Colors.GREEN
+        out = [
+            f"{Colors.DIM}[{timestamp}] {_colored_project(project)}",
+            f"{marker_color}{marker}{Colors.ENDC} {lines[0]}",
+        ]
+        out.extend(f"   {line}" for line in lines[1:])
+    out.extend(('', ''))
+    return '\n'.join(out)
 
 
 def watch_conversations(project_filter=None, compact=False):
@@ -127,86 +244,176 @@ def watch_conversations(project_filter=None, compact=False):
         print(f"{Colors.RED}Error: Claude Code directory not found at {projects_dir}{Colors.ENDC}")
         sys.exit(1)
 
-    # Track which responses we've already seen and file positions
-    seen_responses = defaultdict(set)
-    file_positions = {}
-
+    # Resolve once so scanned paths and watcher event paths compare equal
+    projects_dir = projects_dir.resolve()
+
+    # Query the terminal width once rather than for every message
+    max_width = get_max_width()
+
+    # Track (fd, position, path) per file and last seen sizes. The fd is None until
+    # a file first grows. Each complete line is read exactly once, so no
+    # per-message deduplication is needed. path_keys maps each path back to its
+    # key so a deleted file's state can be dropped before its inode is reused.
+    open_files = {}
+    file_sizes = {}
+    path_keys = {}
+
+    # Directory mtimes from the last scan; the file list is reused until one changes
+    dir_mtimes = {}
+    conv_files = None
+
+    # Files first seen after the initial scan are new sessions and are read from
+    # the beginning; only files that existed at startup are skipped to EOF
+    initial_scan_done = False
+
+    def _forget_file(file_key):
+        """Drop all state kept for a file and close its descriptor."""
+        fd, _, path = open_files.pop(file_key)
+        if fd is not None:
+            os.close(fd)
+        file_sizes.pop(file_key, None)
+        if path_keys.get(path) == file_key:
+            del path_keys[path]
+
+    def _process_session_file(file_path, project, from_start=False):
+        """Display any new messages appended to a single conversation file.
+
+        Returns the file's (device, inode) key, or None if it could not be stat'ed.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        # Key by (device, inode) so a rotated or replaced file is treated as new
+        file_key = (st.st_dev, st.st_ino)
+
+        # A freed inode can be reused right away by a different file, and a path
+        # can move to a new inode; in either case the old state no longer applies
+        entry = open_files.get(file_key)
+        if entry is not None and entry[2] != file_path:
+            _forget_file(file_key)
+        old_key = path_keys.get(file_path)
+        if old_key is not None and old_key != file_key:
+            # Rotated: the new inode's contents have never been shown, so read it all
+            _forget_file(old_key)
+            from_start = True
+
+        # On first run, skip all existing content and start from end of file.
+        # The stat above is all that's needed; the file is opened once it grows.
+        if file_key not in open_files:
+            path_keys[file_path] = file_key
+            if not from_start:
+                open_files[file_key] = (None, st.st_size, file_path)
+                file_sizes[file_key] = st.st_size
+                return file_key  # Skip processing this file on first load
+            open_files[file_key] = (None, 0, file_path)
+
+        # Nothing was appended since the last look, so don't read the file
+        if st.st_size == file_sizes.get(file_key):
+            return file_key
+
+        # Read only the bytes appended since the last position
+        fd, pos, _ = open_files[file_key]
+        if st.st_size < pos:
+            pos = 0  # Truncated in place; start over from the beginning
+        if fd is None:
+            try:
+                fd = os.open(file_path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError:
+                return file_key
+            open_files[file_key] = (fd, pos, file_path)
+        try:
+            lines, pos = read_new_lines(fd, pos, st.st_size)
+        except OSError:
+            return file_key
+        open_files[file_key] = (fd, pos, file_path)
+        file_sizes[file_key] = st.st_size
+
+        # Extract all messages (user and assistant)
+        messages = parse_messages(lines)
+
+        for message in messages:
+            # Display the delta with a single write per message (flushed by line buffering)
+            timestamp = _format_clock(int(time.time()))
+            sys.stdout.write(render_message(message, project, timestamp, compact, max_width))
+
+        return file_key
+
+    def _discover_files():
+        """Scan for conversation files, seeding positions for newly created ones."""
+        nonlocal conv_files, initial_scan_done
+        if conv_files is None or directories_changed(dir_mtimes):
+            dir_mtimes.clear()
+            conv_files = find_conversation_files(projects_dir, project_filter, dir_mtimes)
+
+        live_keys = set()
+        for project, files in sorted(conv_files.items()):
+            for file_path in files:
+                file_key = _process_session_file(file_path, project, from_start=initial_scan_done)
+                if file_key is not None:
+                    live_keys.add(file_key)
+        initial_scan_done = True
+
+        # Forget files that were deleted or rotated away
+        for file_key in open_files.keys() - live_keys:
+            _forget_file(file_key)
+        return conv_files
 
     try:
-        initial_load = True
-        while True:
-            conv_files = find_conversation_files(projects_dir, project_filter)
-
-            if initial_load and not conv_files:
-                print(f"{Colors.YELLOW}No conversations found. Waiting...{Colors.ENDC}")
-                initial_load = False
-
-            for project, files in sorted(conv_files.items()):
-                for file_path in files:
-                    file_key = str(file_path)
-
-                    # On first run, skip all existing content and start from end of file
-                    if file_key not in file_positions:
-                        try:
-                            with open(file_path, 'r') as f:
-                                f.seek(0, 2)  # Seek to end
-                                file_positions[file_key] = f.tell()
-                        except:
-                            pass
-                        continue  # Skip processing this file on first load
-
-                    last_pos = file_positions.get(file_key, None)
-
-                    # Extract all messages (user and assistant)
-                    messages = extract_all_messages(file_path, last_pos)
-
-                    # Update file position
-                    try:
-                        with open(file_path, 'r') as f:
-                            f.seek(0, 2)  # Seek to end
-                            file_positions[file_key] = f.tell()
-                    except:
-                        pass
-
-                    for message in messages:
-                        msg_id = message['id']
-
-                        # Check if we haven't seen this message before
-                        if msg_id not in seen_responses[file_key]:
-                            seen_responses[file_key].add(msg_id)
-                            initial_load = False
-
-                            # Display the delta
-                            timestamp = datetime.now().strftime("%H:%M:%S")
-                            is_user = message['type'] == 'user'
-
-                            if compact:
-                                # Compact format: just the message
-                                lines = format_response(message['text'])
-                                marker = ">>" if is_user else "<<"
-                                marker_color = Colors.YELLOW if is_user else Colors.GREEN
-                                print(f"{Colors.DIM}[{timestamp}]{Colors.ENDC} ", end='', flush=True)
-                                for i, line in enumerate(lines):
-                                    if i > 0:
-                                        print('         ', end='', flush=True)
-                                    print(line, flush=True)
-                                print()
-                            else:
-                                # Full format with header
-                                print(f"{Colors.DIM}[{timestamp}] {Colors.CYAN}{project}{Colors.ENDC}", flush=True)
-
-                                # Format and print the message
-                                message_text = message['text']
-                                lines = format_response(message_text)
-                                marker = ">>" if is_user else "<<"
-                                marker_color = Colors.YELLOW if is_user else Colors.GREEN
-                                print(f"{marker_color}{marker}{Colors.ENDC} {lines[0]}", flush=True)
-                                for line in lines[1:]:
-                                    print(f"   {line}", flush=True)
-                                print()
-
-            # Poll for changes every 0.1 seconds (faster real-time detection)
-            time.sleep(0.1)
+        if not _discover_files():
+            print(f"{Colors.YELLOW}No conversations found. Waiting...{Colors.ENDC}")
+
+        if watch is None:
+            # No watchfiles available: poll for changes every 0.1 seconds
+            while True:
+                time.sleep(0.1)
+                _discover_files()
+
+        last_discovery = time.monotonic()
+        for changes in watch(
+            projects_dir,
+            recursive=True,
+            watch_filter=lambda change, path: path.endswith('.jsonl'),
+            debounce=100,
+            step=10,
+            rust_timeout=int(HOUSEKEEPING_INTERVAL * 1000),
+            yield_on_timeout=True,
+        ):
+            # Apply deletions before any add or modify: the batch is a set with no
+            # order, and a file removed and recreated within one debounce window
+            # must not have its new state dropped after it was read
+            added = {path for change, path in changes if change == Change.added}
+            for change, path in changes:
+                if change != Change.deleted:
+                    continue
+                file_key = path_keys.get(path)
+                if file_key is None:
+                    continue
+                # Keep the state if the same file is still there, unless the path was
+                # also re-added (a recreated file can reuse the freed inode)
+                try:
+                    st = os.stat(path)
+                    if (st.st_dev, st.st_ino) == file_key and path not in added:
+                        continue
+                except OSError:
+                    pass
+                _forget_file(file_key)
+
+            for change, path in changes:
+                if change == Change.deleted:
+                    continue
+
+                project = os.path.basename(os.path.dirname(path))
+                if project_filter and project_filter.lower() not in project.lower():
+                    continue
+
+                # Files created after startup are read from the beginning
+                _process_session_file(path, project, from_start=True)
+
+            # Housekeeping: pick up anything the watcher may have missed
+            if time.monotonic() - last_discovery >= HOUSEKEEPING_INTERVAL:
+                _discover_files()
+                last_discovery = time.monotonic()
 
     except KeyboardInterrupt:
         print(f"\n{Colors.GREEN}Stopped tracking{Colors.ENDC}")
@@ -214,9 +421,16 @@ def watch_conversations(project_filter=None, compact=False):
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.ENDC}")
         sys.exit(1)
+    finally:
+        for fd, _, _ in open_files.values():
+            if fd is not None:
+                os.close(fd)
 
 
 def main():
+    # Flush at each newline even when piped, so messages show up as they arrive
+    sys.stdout.reconfigure(line_buffering=True)
+
     parser = argparse.ArgumentParser(
         description='Track Claude Code conversation deltas in real-time',
         formatter_class=argparse.RawDescriptionHelpFormatter,